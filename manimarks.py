@@ -13,66 +13,171 @@ Features:
 import json
 import math
 import os
-from datetime import datetime
+import re
+import time
+from functools import lru_cache
+
+try:
+    import orjson
+except ImportError:  # optional; the stdlib codec is used on its own
+    orjson = None
+
+def _dumps(data):
+    # orjson writes NaN/Infinity as null, so leave non-finite values to json
+    if orjson is not None and all(not isinstance(v, float) or math.isfinite(v) for v in data.values()):
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+def _loads(raw):
+    if orjson is not None:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass  # e.g. NaN/Infinity written by json, which orjson rejects
+    return json.loads(raw)
 
 DATA_FILE = "pf_chatbot_user.json"
 
+# commas may only sit between digits, so both 1,500,000 and 1,00,000 are accepted
+_FLOAT_RE = re.compile(r"[+-]?(?:\d+(?:,\d+)*(?:\.\d*)?|\.\d+)")
+_INT_RE = re.compile(r"[+-]?\d+")
+
+# set when the in-memory profile differs from DATA_FILE; written on "Save & exit"
+_dirty = False
+
+# (slabs, bands) from the last tax estimate, so what-if runs can skip re-entering slabs
+_slab_cache = None
+
+_MENU = """
+Main Menu:
+ 1) Setup / Update Profile
+ 2) Savings projection
+ 3) Emergency fund recommendation
+ 4) Investment projection (SIP / Lump sum)
+ 5) Retirement projection
+ 6) Tax estimator (configurable slabs)
+ 7) Quick personalized advice
+ 8) Save profile & exit
+ 9) Exit without saving"""
+
+_GENERAL_TIPS = """General tips:
+ - Maintain 6 months emergency fund for essentials.
+ - Clear high-interest debt first (credit cards, personal loans).
+ - Diversify: keep some money in liquid cash, some in debt, some in equity for long-term growth.
+ - Review tax-saving opportunities legally available to you each year.
+"""
+
 # ---------------- Utility functions ----------------
 def format_currency(x):
+    """Format arbitrary (possibly non-numeric) input as rupees; non-numbers come back as str(x)."""
     try:
         x = float(x)
     except:
         return str(x)
+    return _fmt(x)
+
+def _fmt(x):
+    """format_currency for values already known to be numbers (all internal call sites)."""
     # Basic formatting (no locale dependency)
     return f"₹{x:,.2f}"
 
 def save_user(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+    # write to a temp file and swap it in, so a crash never leaves a half-written profile
+    tmp = DATA_FILE + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(_dumps(data))
+    os.replace(tmp, DATA_FILE)
 
 def load_user():
     if not os.path.exists(DATA_FILE):
         return {}
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
+    with open(DATA_FILE, "rb") as f:
+        return _loads(f.read())
 
 def get_float(prompt, default=None):
     while True:
-        try:
-            s = input(prompt).strip()
-            if s == "" and default is not None:
-                return default
-            val = float(s.replace(",", ""))
-            return val
-        except ValueError:
-            print("  Please enter a valid number (e.g. 15000 or 15000.50).")
+        s = input(prompt).strip()
+        if s == "" and default is not None:
+            return default
+        if _FLOAT_RE.fullmatch(s):
+            return float(s.replace(",", ""))
+        print("  Please enter a valid number (e.g. 15000 or 15000.50).")
 
 def get_int(prompt, default=None):
     while True:
-        try:
-            s = input(prompt).strip()
-            if s == "" and default is not None:
-                return default
-            val = int(s)
-            return val
-        except ValueError:
-            print("  Please enter a valid integer.")
+        s = input(prompt).strip()
+        if s == "" and default is not None:
+            return default
+        if _INT_RE.fullmatch(s):
+            return int(s)
+        print("  Please enter a valid integer.")
+
+def get_number_list(prompt, default, cast=float):
+    """Comma-separated numbers (e.g. 15,20,25); blank input gives [default]."""
+    pattern = _INT_RE if cast is int else _FLOAT_RE
+    while True:
+        s = input(prompt).strip()
+        if s == "":
+            return [default]
+        parts = [part.strip() for part in s.split(",")]
+        if all(pattern.fullmatch(part) for part in parts):
+            return [cast(part) for part in parts]
+        print("  Please enter one or more numbers separated by commas (e.g. 15,20,25).")
 
 # ---------------- Financial calculators ----------------
 
+@lru_cache(maxsize=256)
 def savings_projection(monthly_saving, annual_rate_pct, years):
     """Future value of a monthly saving into an account with compounding monthly."""
     r = annual_rate_pct / 100.0 / 12.0
     n = years * 12
-    fv = 0.0
-    for _ in range(n):
-        fv = (fv + monthly_saving) * (1 + r)
-    return fv
+    if n <= 0 or monthly_saving == 0:
+        return 0.0
+    if r == 0:
+        return monthly_saving * n
+    # annuity-due: each deposit earns interest for the month it is made
+    return monthly_saving * (_growth_minus_one(r, n) / r) * (1 + r)
 
+def _growth_minus_one(r, n):
+    """(1 + r) ** n - 1; expm1/log1p keep it accurate when r is tiny."""
+    try:
+        if r <= -1:
+            # log1p is undefined at or below -1, so use the plain power
+            return (1 + r) ** n - 1
+        return math.expm1(n * math.log1p(r))
+    except OverflowError:
+        return _overflow_inf(1 + r, n)
+
+def _overflow_inf(base, n):
+    """Signed infinity standing in for an overflowing base ** n (what compounding in a loop reaches)."""
+    if base < 0 and isinstance(n, int) and n % 2:
+        return -math.inf
+    return math.inf
+
+def _ipow(base, n):
+    """base ** n for a non-negative integer n by repeated squaring."""
+    result = 1.0
+    while n:
+        if n & 1:
+            result *= base
+        base *= base
+        n >>= 1
+    return result
+
+@lru_cache(maxsize=256)
 def lump_sum_growth(principal, annual_rate_pct, years):
     """Future value of a one-time investment with annual compounding."""
     r = annual_rate_pct / 100.0
-    return principal * ((1 + r) ** years)
+    if isinstance(years, int) and years >= 0:
+        return principal * _ipow(1.0 + r, years)
+    if principal == 0:
+        return 0.0
+    try:
+        if r <= -1:
+            return principal * ((1 + r) ** years)
+        return principal * math.exp(years * math.log1p(r))
+    except OverflowError:
+        return principal * _overflow_inf(1 + r, years)
 
 def sip_needed(goal_amount, annual_rate_pct, years):
     """Monthly SIP needed to reach goal_amount given expected annual return."""
@@ -81,7 +186,7 @@ def sip_needed(goal_amount, annual_rate_pct, years):
     if r == 0:
         return goal_amount / n
     # formula for annuity: payment = FV * r / ((1+r)^n - 1)
-    payment = goal_amount * r / ((1 + r) ** n - 1)
+    payment = goal_amount * r / _growth_minus_one(r, n)
     return payment
 
 def emergency_fund_recommendation(monthly_expenses, months=6):
@@ -93,34 +198,39 @@ def retirement_projection(current_savings, monthly_contrib, years_to_retire, ann
     sip_future = savings_projection(monthly_contrib, annual_return_pct, years_to_retire)
     return lump + sip_future
 
+def retirement_projection_grid(current_savings, monthly_contrib, years_list, rates_list):
+    """Corpus for every (years, rate) scenario; row i is years_list[i], column j is rates_list[j]."""
+    return [[retirement_projection(current_savings, monthly_contrib, years, rate) for rate in rates_list]
+            for years in years_list]
+
 # ---------------- Tax estimator (configurable) ----------------
 def estimate_tax(taxable_income, slabs):
     """
     slabs: list of tuples (upper_limit, rate_pct) in ascending order.
-    last slab can have upper_limit = None meaning 'rest'.
-    Example: [(250000, 0), (500000, 5), (1000000, 20), (None, 30)]
+    last slab can have upper_limit = math.inf meaning 'rest'.
+    Example: [(250000, 0), (500000, 5), (1000000, 20), (math.inf, 30)]
     """
-    tax = 0.0
-    prev_limit = 0.0
-    remaining = taxable_income
+    return tax_from_bands(taxable_income, slab_bands(slabs))
+
+def slab_bands(slabs):
+    """Convert slabs into (lower, upper, rate_fraction) bands, done once per slab set."""
+    bands = []
+    lower = 0.0
     for limit, rate in slabs:
-        if limit is None:
-            taxable_here = remaining
-        else:
-            taxable_here = max(0.0, min(remaining, limit - prev_limit))
-        if taxable_here <= 0:
-            prev_limit = limit if limit is not None else prev_limit
-            continue
-        tax += taxable_here * (rate / 100.0)
-        remaining -= taxable_here
-        prev_limit = limit if limit is not None else prev_limit
-        if remaining <= 0:
-            break
-    return tax
+        upper = float(limit)
+        bands.append((lower, upper, rate / 100.0))
+        lower = upper
+    return bands
+
+def tax_from_bands(taxable_income, bands):
+    """Sum over bands of the income falling inside each band times its rate."""
+    return sum(max(0.0, min(upper, taxable_income) - lower) * rate
+               for lower, upper, rate in bands)
 
 # ---------------- CLI actions ----------------
 
 def setup_profile(user):
+    global _dirty
     print("\n--- Setup Profile ---")
     name = input("Your name: ").strip() or user.get("name", "")
     monthly_income = get_float("Monthly take-home income (₹): ", user.get("monthly_income", 0.0))
@@ -133,10 +243,10 @@ def setup_profile(user):
         "name": name,
         "monthly_income": monthly_income,
         "monthly_expenses": monthly_expenses,
-        "updated": datetime.utcnow().isoformat()
+        "updated": time.time()
     })
-    save_user(user)
-    print("Profile saved.\n")
+    _dirty = True
+    print("Profile updated. Choose 'Save profile & exit' to keep the changes.\n")
     return user
 
 def run_savings_projection(user):
@@ -145,14 +255,14 @@ def run_savings_projection(user):
     rate = get_float("Expected annual return rate (%) (e.g., 6 for bank FD, 12 for balanced funds): ", 8.0)
     years = get_int("For how many years will you save? (years): ", 10)
     fv = savings_projection(monthly, rate, years)
-    print(f"In {years} years, saving {format_currency(monthly)} monthly at {rate}% pa => {format_currency(fv)}\n")
+    print(f"In {years} years, saving {_fmt(monthly)} monthly at {rate}% pa => {_fmt(fv)}\n")
 
 def run_emergency_recommendation(user):
     print("\n--- Emergency Fund ---")
     monthly_expenses = get_float("What are your monthly essential expenses (₹): ", user.get("monthly_expenses", 0.0))
     months = get_int("How many months of cover do you want? (typical 3-12): ", 6)
     eh = emergency_fund_recommendation(monthly_expenses, months)
-    print(f"Recommended emergency fund: {months} × {format_currency(monthly_expenses)} = {format_currency(eh)}\n")
+    print(f"Recommended emergency fund: {months} × {_fmt(monthly_expenses)} = {_fmt(eh)}\n")
 
 def run_investment_projection(user):
     print("\n--- Investment Projection (SIP & Lump Sum) ---")
@@ -162,36 +272,56 @@ def run_investment_projection(user):
         rate = get_float("Expected annual return (%) : ", 12.0)
         years = get_int("Investment period (years): ", 10)
         fv = savings_projection(monthly, rate, years)
-        print(f"Monthly {format_currency(monthly)} for {years} years at {rate}% pa -> {format_currency(fv)}")
+        print(f"Monthly {_fmt(monthly)} for {years} years at {rate}% pa -> {_fmt(fv)}")
     else:
         principal = get_float("Lump sum amount (₹): ", 100000.0)
         rate = get_float("Expected annual return (%) : ", 8.0)
         years = get_int("Period (years): ", 5)
         fv = lump_sum_growth(principal, rate, years)
-        print(f"{format_currency(principal)} for {years} years at {rate}% pa -> {format_currency(fv)}")
+        print(f"{_fmt(principal)} for {years} years at {rate}% pa -> {_fmt(fv)}")
     print()
 
+def retirement_target():
+    """Ask for desired annual retirement expenses and return the rule-of-thumb corpus."""
+    # simple rule of thumb: 25x annual expenses
+    annual_expenses = get_float("Estimate your desired annual retirement expenses (₹): ", 300000.0)
+    need = annual_expenses * 25
+    print(f"Rule-of-thumb needed corpus (25× annual expenses): {_fmt(need)}")
+    return need
+
 def run_retirement_projection(user):
     print("\n--- Retirement Projection ---")
     current = get_float("Current retirement savings (₹): ", user.get("current_savings", 0.0))
     monthly_contrib = get_float("Monthly contribution to retirement (₹): ", 5000.0)
-    years = get_int("Years until retirement: ", 20)
-    rate = get_float("Expected annual return (%) : ", 8.0)
+    years_list = get_number_list("Years until retirement (comma-separated to compare, e.g. 15,20,25): ", 20, int)
+    rates_list = get_number_list("Expected annual return (%) (comma-separated to compare, e.g. 6,8,10): ", 8.0)
+    if len(years_list) > 1 or len(rates_list) > 1:
+        run_retirement_grid(current, monthly_contrib, years_list, rates_list)
+        return
+    years, rate = years_list[0], rates_list[0]
     corpus = retirement_projection(current, monthly_contrib, years, rate)
-    print(f"Estimated retirement corpus in {years} years: {format_currency(corpus)}")
-    # simple rule of thumb: 25x annual expenses
-    annual_expenses = get_float("Estimate your desired annual retirement expenses (₹): ", 300000.0)
-    need = annual_expenses * 25
-    print(f"Rule-of-thumb needed corpus (25× annual expenses): {format_currency(need)}")
+    print(f"Estimated retirement corpus in {years} years: {_fmt(corpus)}")
+    need = retirement_target()
     if corpus >= need:
         print("Good — projected corpus meets the simple target.")
     else:
         short = need - corpus
-        print(f"Shortfall: {format_currency(short)} — consider increasing savings or retirement horizon.")
+        print(f"Shortfall: {_fmt(short)} — consider increasing savings or retirement horizon.")
     print()
 
-def run_tax_estimator(user):
-    print("\n--- Tax Estimator (Configurable slabs) ---")
+def run_retirement_grid(current, monthly_contrib, years_list, rates_list):
+    grid = retirement_projection_grid(current, monthly_contrib, years_list, rates_list)
+    print("Estimated retirement corpus by horizon and annual return:")
+    print(f"{'Years':>6}" + "".join(f"{str(rate) + '%':>20}" for rate in rates_list))
+    for years, row in zip(years_list, grid):
+        print(f"{years:>6}" + "".join(f"{_fmt(corpus):>20}" for corpus in row))
+    need = retirement_target()
+    met = sum(corpus >= need for row in grid for corpus in row)
+    print(f"{met} of {len(years_list) * len(rates_list)} scenarios meet the simple target.")
+    print()
+
+def read_slabs():
+    """Prompt for tax slabs until a blank line; returns a list of (upper_limit, rate_pct)."""
     print("You will provide tax slabs. Example entry: upper_limit rate_percent")
     print("Enter slabs in ascending order. For last slab, enter upper_limit as 'none'.")
     print("Example:")
@@ -210,7 +340,7 @@ def run_tax_estimator(user):
             continue
         up, r = parts
         if up.lower() in ("none", "nil", "rest"):
-            up_val = None
+            up_val = math.inf
         else:
             try:
                 up_val = float(up)
@@ -223,35 +353,48 @@ def run_tax_estimator(user):
             print("  Invalid rate_percent. Use a number like 5 or 20.")
             continue
         slabs.append((up_val, r_val))
-    if not slabs:
-        print("No slabs entered. Aborting tax estimator.\n")
-        return
+    return slabs
+
+def run_tax_estimator(user):
+    global _slab_cache
+    print("\n--- Tax Estimator (Configurable slabs) ---")
+    bands = None
+    if _slab_cache is not None:
+        reuse = input("Reuse the slabs you entered last time? (y/n): ").strip().lower()
+        if reuse.startswith("y"):
+            bands = _slab_cache[1]
+    if bands is None:
+        slabs = read_slabs()
+        if not slabs:
+            print("No slabs entered. Aborting tax estimator.\n")
+            return
+        key = tuple(slabs)
+        if _slab_cache is None or _slab_cache[0] != key:
+            _slab_cache = (key, slab_bands(slabs))
+        bands = _slab_cache[1]
     income = get_float("Enter your taxable income (₹): ", user.get("annual_income", user.get("monthly_income", 0.0) * 12))
-    tax = estimate_tax(income, slabs)
-    print(f"Estimated tax on {format_currency(income)} = {format_currency(tax)}\n")
+    tax = tax_from_bands(income, bands)
+    print(f"Estimated tax on {_fmt(income)} = {_fmt(tax)}\n")
 
 def quick_advice(user):
     # Concise personalized tips
-    print("\n--- Quick Personalized Advice ---")
+    lines = ["\n--- Quick Personalized Advice ---"]
     mi = user.get("monthly_income", 0.0)
     me = user.get("monthly_expenses", 0.0)
     if mi <= 0:
-        print("Set up your monthly income in profile for tailored advice.")
+        lines.append("Set up your monthly income in profile for tailored advice.")
     else:
         save = max(0.0, mi - me)
         save_pct = (save / mi * 100) if mi > 0 else 0.0
-        print(f"Estimated monthly savings: {format_currency(save)} ({save_pct:.1f}% of income)")
+        lines.append(f"Estimated monthly savings: {_fmt(save)} ({save_pct:.1f}% of income)")
         if save_pct < 10:
-            print("Tip: Try to increase savings rate gradually to at least 10-20% of income.")
+            lines.append("Tip: Try to increase savings rate gradually to at least 10-20% of income.")
         elif save_pct < 30:
-            print("Good. Aim to automate some investments (SIP / recurring deposit).")
+            lines.append("Good. Aim to automate some investments (SIP / recurring deposit).")
         else:
-            print("Great savings rate — consider increasing equity allocation for long-term goals.")
-    print("General tips:")
-    print(" - Maintain 6 months emergency fund for essentials.")
-    print(" - Clear high-interest debt first (credit cards, personal loans).")
-    print(" - Diversify: keep some money in liquid cash, some in debt, some in equity for long-term growth.")
-    print(" - Review tax-saving opportunities legally available to you each year.\n")
+            lines.append("Great savings rate — consider increasing equity allocation for long-term goals.")
+    lines.append(_GENERAL_TIPS)
+    print("\n".join(lines))
 
 # ---------------- Main loop ----------------
 def main():
@@ -262,16 +405,7 @@ def main():
     else:
         print("No profile found. Create one in Setup Profile.")
     while True:
-        print("\nMain Menu:")
-        print(" 1) Setup / Update Profile")
-        print(" 2) Savings projection")
-        print(" 3) Emergency fund recommendation")
-        print(" 4) Investment projection (SIP / Lump sum)")
-        print(" 5) Retirement projection")
-        print(" 6) Tax estimator (configurable slabs)")
-        print(" 7) Quick personalized advice")
-        print(" 8) Save profile & exit")
-        print(" 9) Exit without saving")
+        print(_MENU)
         choice = input("Choose (1-9): ").strip()
         if choice == "1":
             user = setup_profile(user)
@@ -288,8 +422,11 @@ def main():
         elif choice == "7":
             quick_advice(user)
         elif choice == "8":
-            save_user(user)
-            print("Profile saved. Goodbye!")
+            if _dirty:
+                save_user(user)
+                print("Profile saved. Goodbye!")
+            else:
+                print("No changes to save. Goodbye!")
             break
         elif choice == "9":
             print("Goodbye!")